@@ -15,13 +15,29 @@ authentication is performed via the `OPENAI_API_KEY` environment
 variable【695241305770331†L199-L225】.  See the README for details.
 """
 
+import base64
+import functools
 import glob as globlib
+import http.client
+import io
+import itertools
 import json
+import mmap
 import os
 import re
+import shutil
+import signal
+import stat
 import subprocess
+import sys
+import tempfile
+import threading
+import urllib.parse
 import urllib.request
-from typing import Any, Dict, List
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 
 # Default API endpoint and model.  These values are overridden at
@@ -32,6 +48,12 @@ OPENAI_RESPONSES_URL = "https://api.openai.com/v1/responses"
 
 MODEL = os.environ.get("MODEL", "claude-opus-4-5")
 
+# The backend is fixed by MODEL, so resolve it once at startup
+_MODEL_LOWER = MODEL.lower()
+_USE_ANTHROPIC = _MODEL_LOWER.startswith(("claude", "anthropic"))
+# Codex models only live behind the responses API
+_USE_RESPONSES = "codex" in _MODEL_LOWER
+
 # ANSI colours for terminal output
 RESET, BOLD, DIM = "\033[0m", "\033[1m", "\033[2m"
 BLUE, CYAN, GREEN, YELLOW, RED = (
@@ -42,15 +64,76 @@ BLUE, CYAN, GREEN, YELLOW, RED = (
     "\033[31m",
 )
 
+# Maximum number of matching lines returned by grep
+GREP_LIMIT = 50
+
+# Files larger than this many bytes are memory-mapped by read
+MMAP_READ_THRESHOLD = 1_000_000
+
+# Directories never descended into when searching
+SKIP_DIRS = {".git", "__pycache__", "node_modules"}
+
+# Matches **bold** spans in assistant text
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+
+# Regex pieces that may match differently on bytes than on text: the \w,
+# \b, \d and \s classes, character and numeric escapes, negated classes and
+# a lone "." (one byte rather than one character), and the i, L and u
+# flags.  Every escape is matched so that an escaped "." or "[" is not
+# mistaken for one; _compile decides which escapes matter.
+_UNICODE_SENSITIVE_RE = re.compile(r"\\.|\[\^|\.(?![*+])|\(\?[a-zA-Z]*[iLu]")
+
+# Line endings recognised by text mode's universal newlines
+_NEWLINE_RE = re.compile(rb"\r\n?|\n")
+
 # --- Tool implementations ---
 
+def _line_end(mm: mmap.mmap, pos: int) -> int:
+    """Return the index just past the first line ending at or after ``pos``, or 0 if none."""
+    match = _NEWLINE_RE.search(mm, pos)
+    return match.end() if match else 0
+
+
+def _mmap_lines(path: str, offset: int, limit: Optional[int]) -> List[str]:
+    """Return lines ``[offset, offset + limit)`` of a file, decoding only that window.
+
+    Lines end where text mode ends them (``\\n``, ``\\r\\n`` or a lone ``\\r``),
+    and the window is decoded with ``open()``'s default encoding and error
+    handling, so the result matches reading the file in text mode.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        for _ in range(offset):
+            start = _line_end(mm, start)
+            if not start:
+                return []
+        end = len(mm)
+        if limit is not None:
+            end = start
+            for _ in range(limit):
+                end = _line_end(mm, end)
+                if not end:
+                    end = len(mm)
+                    break
+        return io.TextIOWrapper(io.BytesIO(mm[start:end])).readlines()
+
+
 def read(args: Dict[str, Any]) -> str:
-    """Read a file and return selected lines with line numbers."""
-    lines = open(args["path"]).readlines()
+    """Read a file and return selected lines with line numbers.
+
+    Only the lines up to the end of the requested window are read.  Large
+    files are memory-mapped so the lines before the window are skipped
+    without being decoded.
+    """
+    path = args["path"]
     offset = args.get("offset", 0)
-    limit = args.get("limit", len(lines))
-    selected = lines[offset : offset + limit]
-    return "".join(f"{offset + idx + 1:4}| {line}" for idx, line in enumerate(selected))
+    limit = args.get("limit")
+    if os.path.getsize(path) > MMAP_READ_THRESHOLD:
+        selected = _mmap_lines(path, offset, limit)
+    else:
+        with open(path) as f:
+            selected = list(itertools.islice(f, offset, None if limit is None else offset + limit))
+    return "".join(f"{num:4}| {line}" for num, line in enumerate(selected, offset + 1))
 
 
 def write(args: Dict[str, Any]) -> str:
@@ -62,49 +145,147 @@ def write(args: Dict[str, Any]) -> str:
 
 def edit(args: Dict[str, Any]) -> str:
     """Replace occurrences of a string in a file."""
-    text = open(args["path"]).read()
+    with open(args["path"]) as f:
+        text = f.read()
     old, new = args["old"], args["new"]
-    if old not in text:
+    if not old:
+        return "error: old_string must not be empty"
+    # A single split both counts the occurrences and yields the pieces to
+    # rejoin.  A unique replacement only needs to know whether a second
+    # occurrence exists, so that scan stops there.
+    parts = text.split(old) if args.get("all") else text.split(old, 2)
+    if len(parts) == 1:
         return "error: old_string not found"
-    count = text.count(old)
-    if not args.get("all") and count > 1:
+    if len(parts) > 2 and not args.get("all"):
+        count = text.count(old)
         return f"error: old_string appears {count} times, must be unique (use all=true)"
-    replacement = text.replace(old, new) if args.get("all") else text.replace(old, new, 1)
     with open(args["path"], "w") as f:
-        f.write(replacement)
+        f.write(new.join(parts))
     return "ok"
 
 
+def _mtime(path: str) -> float:
+    """Return the modification time of a regular file, or 0 for anything else."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0
+    return st.st_mtime if stat.S_ISREG(st.st_mode) else 0
+
+
 def glob(args: Dict[str, Any]) -> str:
     """Find files matching a pattern and return them sorted by modification time."""
     pattern = (args.get("path", ".") + "/" + args["pat"]).replace("//", "/")
-    files = globlib.glob(pattern, recursive=True)
-    files = sorted(
-        files,
-        key=lambda f: os.path.getmtime(f) if os.path.isfile(f) else 0,
-        reverse=True,
-    )
+    files = sorted(globlib.glob(pattern, recursive=True), key=_mtime, reverse=True)
     return "\n".join(files) or "none"
 
 
+@functools.lru_cache(maxsize=32)
+def _compile(pat: str) -> "re.Pattern":
+    """Compile ``pat``, reusing the result for repeated searches.
+
+    ASCII patterns whose meaning is the same on bytes and on text are
+    compiled as bytes patterns, so lines can be matched without decoding.
+    Anything else stays a str pattern.
+    """
+    if pat.isascii() and not any(
+        not piece.startswith("\\") or piece[1] in "wWbBdDsSxuUN" or piece[1].isdigit()
+        for piece in _UNICODE_SENSITIVE_RE.findall(pat)
+    ):
+        return re.compile(pat.encode())
+    return re.compile(pat)
+
+
+def _walk(root: str, seen: Optional[Set[Tuple[int, int]]] = None) -> Iterator[os.DirEntry]:
+    """Yield the files under ``root``, pruning hidden and ``SKIP_DIRS`` directories.
+
+    Like ``glob("**")``, hidden entries are skipped and symlinked directories
+    are followed.  Each directory is entered once, keyed by device and inode,
+    so symlink cycles end.
+    """
+    if seen is None:
+        try:
+            st = os.stat(root)
+        except OSError:
+            return
+        seen = {(st.st_dev, st.st_ino)}
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            if entry.name in SKIP_DIRS:
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                yield from _walk(entry.path, seen)
+        elif entry.is_file():
+            yield entry
+
+
+def _scan_file(filepath: str, pattern: "re.Pattern", stop: threading.Event) -> List[str]:
+    """Return up to ``GREP_LIMIT`` matching lines of one file, or none once ``stop`` is set.
+
+    Empty files and files with a NUL byte in the first 8 KB are treated as
+    binary and skipped without being read further.  A bytes ``pattern`` is
+    matched against raw lines and only the matching ones are decoded.
+    """
+    hits: List[str] = []
+    if stop.is_set():
+        return hits
+    try:
+        with open(filepath, "rb") as raw:
+            head = raw.read(8192)
+            if not head or b"\0" in head:
+                return hits
+            raw.seek(0)
+            as_bytes = isinstance(pattern.pattern, bytes)
+            for line_num, line in enumerate(raw, 1):
+                # Drop \n or \r\n as text mode did, so "$" anchors still match
+                line = line.rstrip(b"\r\n")
+                if pattern.search(line if as_bytes else line.decode(errors="replace")):
+                    text = line.rstrip().decode(errors="replace")
+                    hits.append(f"{filepath}:{line_num}:{text}")
+                    if len(hits) == GREP_LIMIT:
+                        break
+    except Exception:
+        pass
+    return hits
+
+
 def grep(args: Dict[str, Any]) -> str:
-    """Search files for lines matching a regular expression."""
-    pattern = re.compile(args["pat"])
+    """Search files for lines matching a regular expression.
+
+    Files are scanned on a thread pool; results keep the walk order and
+    outstanding scans are skipped once enough hits have been collected.
+    """
+    pattern = _compile(args["pat"])
+    paths = [entry.path for entry in _walk(args.get("path", "."))]
+    stop = threading.Event()
     hits: List[str] = []
-    for filepath in globlib.glob(args.get("path", ".") + "/**", recursive=True):
-        try:
-            for line_num, line in enumerate(open(filepath), 1):
-                if pattern.search(line):
-                    hits.append(f"{filepath}:{line_num}:{line.rstrip()}")
-        except Exception:
-            pass
-    return "\n".join(hits[:50]) or "none"
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for file_hits in pool.map(lambda p: _scan_file(p, pattern, stop), paths):
+            hits.extend(file_hits)
+            if len(hits) >= GREP_LIMIT:
+                stop.set()
+                break
+    return "\n".join(hits[:GREP_LIMIT]) or "none"
 
 
 def bash(args: Dict[str, Any]) -> str:
     """Execute a shell command and return its output."""
+    # Leaving close_fds off lets CPython start /bin/sh with posix_spawn rather
+    # than fork + exec.  Descriptors opened by Python are non-inheritable
+    # (PEP 446), so the shell still only receives stdio and its pipes.
     result = subprocess.run(
-        args["cmd"], shell=True, capture_output=True, text=True, timeout=30
+        args["cmd"], shell=True, capture_output=True, text=True, timeout=30, close_fds=False
     )
     return (result.stdout + result.stderr).strip() or "(empty)"
 
@@ -144,8 +325,41 @@ TOOLS = {
 }
 
 
+# Tools started while a response is still streaming.  A single worker keeps
+# them running one at a time in the order the model issued them.
+_TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+
+# Results of the read-only tools, keyed by call.  Any other tool may change
+# files, so running one bumps the epoch and strands all earlier entries.
+CACHEABLE_TOOLS = {"read", "glob", "grep"}
+TOOL_CACHE_SIZE = 64
+_TOOL_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_CACHE_EPOCH = 0
+
+
+def invalidate_tool_cache() -> None:
+    """Forget all memoized tool results."""
+    global _CACHE_EPOCH
+    _CACHE_EPOCH += 1
+
+
 def run_tool(name: str, args: Dict[str, Any]) -> str:
-    """Dispatch to the appropriate tool function."""
+    """Dispatch to the appropriate tool function, memoizing read-only tools."""
+    if name not in CACHEABLE_TOOLS:
+        invalidate_tool_cache()
+        return _run_tool(name, args)
+    key = (name, json.dumps(args, sort_keys=True), _CACHE_EPOCH)
+    if key in _TOOL_CACHE:
+        _TOOL_CACHE.move_to_end(key)
+        return _TOOL_CACHE[key]
+    result = _TOOL_CACHE[key] = _run_tool(name, args)
+    if len(_TOOL_CACHE) > TOOL_CACHE_SIZE:
+        _TOOL_CACHE.popitem(last=False)
+    return result
+
+
+def _run_tool(name: str, args: Dict[str, Any]) -> str:
     try:
         return TOOLS[name][2](args)
     except Exception as err:
@@ -211,6 +425,34 @@ def make_openai_tools() -> List[Dict[str, Any]]:
     return tools
 
 
+# Compact encoder shared by every request; the history is re-sent each turn,
+# so dropping the default padding after separators shrinks every upload.
+_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+# The tool definitions never change at runtime, so they are built and
+# serialized once and spliced into every request body.
+ANTHROPIC_TOOLS_JSON = _JSON_ENCODER.encode(make_schema())
+OPENAI_TOOLS_JSON = _JSON_ENCODER.encode(make_openai_tools())
+
+
+def encode_body(body: Dict[str, Any], tools_json: str) -> bytes:
+    """Serialize ``body`` with the pre-encoded ``tools`` array appended."""
+    return (_JSON_ENCODER.encode(body)[:-1] + ',"tools":' + tools_json + "}").encode()
+
+
+# OpenAI-format translation of the conversation so far.  The history only
+# grows by appending, so each call converts just the messages added since.
+_CONVERTED: List[Dict[str, Any]] = []
+_CONVERTED_UPTO = 0
+
+
+def reset_converted_messages() -> None:
+    """Forget the cached OpenAI translation, e.g. when the conversation is cleared."""
+    global _CONVERTED_UPTO
+    _CONVERTED.clear()
+    _CONVERTED_UPTO = 0
+
+
 def convert_messages_to_openai(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Translate our internal message structure into OpenAI's format.
 
@@ -219,10 +461,12 @@ def convert_messages_to_openai(messages: List[Dict[str, Any]]) -> List[Dict[str,
     (text or tool_use), and tool results are lists of result dictionaries.
     OpenAI expects a flat list of dicts with roles ``user``, ``assistant`` or
     ``tool`` and optional tool_calls/arguments fields.  This function
-    performs the necessary transformation.
+    performs the necessary transformation, reusing the translation of the
+    messages already seen on earlier calls.
     """
-    openai_msgs: List[Dict[str, Any]] = []
-    for m in messages:
+    global _CONVERTED_UPTO
+    openai_msgs = _CONVERTED
+    for m in messages[_CONVERTED_UPTO:]:
         role = m.get("role")
         content = m.get("content")
         # A plain user input
@@ -264,10 +508,181 @@ def convert_messages_to_openai(messages: List[Dict[str, Any]]) -> List[Dict[str,
                     }
                 )
             continue
+    _CONVERTED_UPTO = len(messages)
     return openai_msgs
 
 
-def call_api(messages: List[Dict[str, Any]], system_prompt: str) -> Dict[str, Any]:
+# Persistent HTTPS connections keyed by host.  Reusing the socket across
+# turns of the agentic loop avoids a fresh TCP + TLS handshake per request.
+_CONNECTIONS: Dict[str, http.client.HTTPSConnection] = {}
+
+
+def _connect(host: str) -> http.client.HTTPSConnection:
+    """Open a connection to ``host``, through the environment's HTTPS proxy if one applies."""
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy or urllib.request.proxy_bypass(host):
+        return http.client.HTTPSConnection(host)
+    if "://" not in proxy:
+        proxy = "http://" + proxy
+    proxy_parts = urllib.parse.urlsplit(proxy)
+    tunnel_headers = {}
+    if proxy_parts.username is not None:
+        user = urllib.parse.unquote(proxy_parts.username)
+        password = urllib.parse.unquote(proxy_parts.password or "")
+        credentials = f"{user}:{password}"
+        tunnel_headers["Proxy-Authorization"] = "Basic " + base64.b64encode(credentials.encode()).decode()
+    conn = http.client.HTTPSConnection(proxy_parts.hostname, proxy_parts.port)
+    conn.set_tunnel(host, headers=tunnel_headers)
+    return conn
+
+
+def _send(host: str, path: str, payload: bytes, headers: Dict[str, str]) -> http.client.HTTPResponse:
+    conn = _CONNECTIONS.get(host)
+    if conn is None:
+        conn = _CONNECTIONS[host] = _connect(host)
+    try:
+        conn.request("POST", path, body=payload, headers=headers)
+        return conn.getresponse()
+    except BaseException:
+        del _CONNECTIONS[host]
+        conn.close()
+        raise
+
+
+def drop_connection(url: str) -> None:
+    """Close the kept-alive connection to ``url``'s host, if any."""
+    conn = _CONNECTIONS.pop(urllib.parse.urlsplit(url).netloc, None)
+    if conn is not None:
+        conn.close()
+
+
+def post_json(url: str, payload: bytes, headers: Dict[str, str]) -> http.client.HTTPResponse:
+    """POST the JSON ``payload`` over a kept-alive connection and return the response.
+
+    The caller must read the response fully before the next request so the
+    connection can be reused.  If the server dropped a reused idle
+    connection since the previous turn, it is reopened and the request sent
+    again; a failure on a fresh connection is never retried.
+    """
+    parts = urllib.parse.urlsplit(url)
+    headers = {"Content-Type": "application/json", "Connection": "keep-alive", **headers}
+    reused = parts.netloc in _CONNECTIONS
+    try:
+        resp = _send(parts.netloc, parts.path, payload, headers)
+    except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+        if not reused:
+            raise
+        resp = _send(parts.netloc, parts.path, payload, headers)
+    if resp.status >= 400:
+        raise RuntimeError(f"HTTP Error {resp.status}: {resp.read().decode(errors='replace')}")
+    return resp
+
+
+def iter_sse(resp: http.client.HTTPResponse) -> Iterator[Dict[str, Any]]:
+    """Yield the decoded JSON payload of each server-sent event in ``resp``.
+
+    The stream is always read to the end so the connection can be reused.
+    """
+    for raw in resp:
+        line = raw.decode().strip()
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data and data != "[DONE]":
+            yield json.loads(data)
+    # Line iteration stops at the end of a Content-Length body without marking
+    # the response closed; read() does, which frees the connection for reuse
+    resp.read()
+
+
+def read_anthropic_stream(
+    resp: http.client.HTTPResponse, on_tool_use: Callable[[Dict[str, Any]], None]
+) -> Dict[str, Any]:
+    """Assemble a streamed Anthropic response into the internal block format.
+
+    ``on_tool_use`` is called with each ``tool_use`` block as soon as its
+    input has been fully received, while the rest of the response is still
+    streaming.
+    """
+    blocks: List[Dict[str, Any]] = []
+    partial_json: Dict[int, List[str]] = {}
+    for event in iter_sse(resp):
+        kind = event.get("type")
+        if kind == "content_block_start":
+            blocks.append(dict(event["content_block"]))
+            partial_json[event["index"]] = []
+        elif kind == "content_block_delta":
+            delta = event["delta"]
+            if delta["type"] == "text_delta":
+                blocks[event["index"]]["text"] += delta["text"]
+            elif delta["type"] == "input_json_delta":
+                partial_json[event["index"]].append(delta["partial_json"])
+        elif kind == "content_block_stop":
+            block = blocks[event["index"]]
+            if block["type"] == "tool_use":
+                block["input"] = json.loads("".join(partial_json[event["index"]]) or "{}")
+                on_tool_use(block)
+        elif kind == "error":
+            raise RuntimeError(event["error"].get("message", event["error"]))
+    return {"content": blocks}
+
+
+def _openai_tool_block(call: Dict[str, Any]) -> Dict[str, Any]:
+    args = {}
+    try:
+        args = json.loads("".join(call["arguments"]) or "{}")
+    except Exception:
+        pass
+    return {"type": "tool_use", "id": call["id"], "name": call["name"], "input": args}
+
+
+def read_openai_stream(
+    resp: http.client.HTTPResponse, on_tool_use: Callable[[Dict[str, Any]], None]
+) -> Dict[str, Any]:
+    """Assemble a streamed Chat Completions response into the internal block format.
+
+    OpenAI does not mark the end of an individual tool call, so a call is
+    handed to ``on_tool_use`` once the next one starts or the stream ends.
+    """
+    text: List[str] = []
+    calls: Dict[int, Dict[str, Any]] = {}
+    tool_blocks: List[Dict[str, Any]] = []
+
+    def finish(call: Dict[str, Any]) -> None:
+        tool_blocks.append(_openai_tool_block(call))
+        on_tool_use(tool_blocks[-1])
+
+    for chunk in iter_sse(resp):
+        if "error" in chunk:
+            raise RuntimeError(chunk["error"].get("message", chunk["error"]))
+        for choice in chunk.get("choices") or []:
+            delta = choice.get("delta") or {}
+            if delta.get("content"):
+                text.append(delta["content"])
+            for call in delta.get("tool_calls") or []:
+                index = call.get("index", 0)
+                function = call.get("function") or {}
+                if index not in calls:
+                    if calls:
+                        finish(calls[max(calls)])
+                    calls[index] = {"id": call.get("id"), "name": None, "arguments": []}
+                if function.get("name"):
+                    calls[index]["name"] = function["name"]
+                calls[index]["arguments"].append(function.get("arguments") or "")
+    if calls:
+        finish(calls[max(calls)])
+    content_blocks: List[Dict[str, Any]] = []
+    # Include plain text if present
+    if text:
+        content_blocks.append({"type": "text", "text": "".join(text)})
+    return {"content": content_blocks + tool_blocks}
+
+
+def call_api(
+    messages: List[Dict[str, Any]],
+    system_prompt: str,
+    on_tool_use: Callable[[Dict[str, Any]], None] = lambda block: None,
+) -> Dict[str, Any]:
     """Send a request to the appropriate backend and return a normalized response.
 
     When the selected ``MODEL`` names a Claude model, this function forwards
@@ -278,137 +693,199 @@ def call_api(messages: List[Dict[str, Any]], system_prompt: str) -> Dict[str, An
     conversation history and tool definitions are converted to the Chat
     Completions schema; an API request is issued and the response is
     converted back into the internal block format.
+
+    Responses are streamed, and ``on_tool_use`` is invoked with each
+    ``tool_use`` block as soon as it is complete so the caller can start
+    running tools before the model has finished its turn.
     """
-    use_anthropic = MODEL.lower().startswith("claude") or MODEL.lower().startswith("anthropic")
-    if use_anthropic:
-        request = urllib.request.Request(
-            ANTHROPIC_API_URL,
-            data=json.dumps(
-                {
-                    "model": MODEL,
-                    "max_tokens": 8192,
-                    "system": system_prompt,
-                    "messages": messages,
-                    "tools": make_schema(),
-                }
-            ).encode(),
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": os.environ.get("ANTHROPIC_API_KEY", ""),
-                "anthropic-version": "2023-06-01",
-            },
-        )
-        resp = urllib.request.urlopen(request)
-        return json.loads(resp.read())
-    # Otherwise use OpenAI
-    # Convert messages and tools
-    openai_messages = convert_messages_to_openai(messages)
-    openai_tools = make_openai_tools()
-    # Determine the endpoint: codex models only live behind the responses API
-    if "codex" in MODEL.lower():
-        url = OPENAI_RESPONSES_URL
+    if _USE_ANTHROPIC:
+        url = ANTHROPIC_API_URL
+        read_stream = read_anthropic_stream
+        body = {
+            "model": MODEL,
+            "max_tokens": 8192,
+            "system": system_prompt,
+            "messages": messages,
+            "stream": True,
+        }
+        payload = encode_body(body, ANTHROPIC_TOOLS_JSON)
+        headers = {
+            "x-api-key": os.environ.get("ANTHROPIC_API_KEY", ""),
+            "anthropic-version": "2023-06-01",
+        }
     else:
-        url = OPENAI_CHAT_URL
-    body = {
-        "model": MODEL,
-        "messages": openai_messages,
-        "tools": openai_tools,
-        # Use a generous token limit to mirror Anthropic's default
-        "max_tokens": 8192,
-    }
-    request = urllib.request.Request(
-        url,
-        data=json.dumps(body).encode(),
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY', '')}",
-        },
-    )
-    resp = urllib.request.urlopen(request)
-    data: Dict[str, Any] = json.loads(resp.read())
-    # Extract the assistant message from the first choice
-    choice = data.get("choices", [{}])[0].get("message", {})
-    content_blocks: List[Dict[str, Any]] = []
-    # Include plain text if present
-    if choice.get("content"):
-        content_blocks.append({"type": "text", "text": choice["content"]})
-    # Process tool calls
-    for call in choice.get("tool_calls", []) or []:
-        args = {}
-        try:
-            args = json.loads(call.get("function", {}).get("arguments", "{}"))
-        except Exception:
-            pass
-        content_blocks.append(
-            {
-                "type": "tool_use",
-                "id": call.get("id"),
-                "name": call.get("function", {}).get("name"),
-                "input": args,
-            }
-        )
-    return {"content": content_blocks}
+        # Otherwise use OpenAI
+        # Convert messages; the tools are already serialized
+        openai_messages = convert_messages_to_openai(messages)
+        url = OPENAI_RESPONSES_URL if _USE_RESPONSES else OPENAI_CHAT_URL
+        read_stream = read_openai_stream
+        body = {
+            "model": MODEL,
+            "messages": openai_messages,
+            # Use a generous token limit to mirror Anthropic's default
+            "max_tokens": 8192,
+            "stream": True,
+        }
+        payload = encode_body(body, OPENAI_TOOLS_JSON)
+        headers = {"Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY', '')}"}
+    resp = post_json(url, payload, headers)
+    try:
+        return read_stream(resp, on_tool_use)
+    except BaseException:
+        # The rest of a half-read stream is still on the socket, so the
+        # connection cannot carry the next request
+        drop_connection(url)
+        raise
+
+
+# Tool results longer than SPOOL_THRESHOLD characters are saved to a
+# per-session temporary directory and only their first SPOOL_HEAD characters
+# go into the history, which is re-sent on every later turn.
+SPOOL_THRESHOLD = 4096
+SPOOL_HEAD = 2048
+_SPOOL_DIR: Optional[str] = None
+
+
+def _in_spool(path: str) -> bool:
+    return _SPOOL_DIR is not None and os.path.realpath(path).startswith(_SPOOL_DIR + os.sep)
+
+
+def spool_result(tool_name: str, tool_args: Dict[str, Any], result: str) -> str:
+    """Save an oversized tool result to disk and return a truncated stand-in.
 
+    Reads of a spooled file are passed through unchanged so the model can
+    page through it instead of spooling it again.
+    """
+    global _SPOOL_DIR
+    if len(result) <= SPOOL_THRESHOLD:
+        return result
+    if tool_name == "read" and _in_spool(str(tool_args.get("path", ""))):
+        return result
+    try:
+        if _SPOOL_DIR is None:
+            _SPOOL_DIR = os.path.realpath(tempfile.mkdtemp(prefix="nanocode-spool-"))
+        path = os.path.join(_SPOOL_DIR, f"{uuid.uuid4().hex}.txt")
+        with open(path, "w") as f:
+            f.write(result)
+    except OSError:
+        return result
+    return f"{result[:SPOOL_HEAD]}\n... [truncated; full output at {path}, read it with offset/limit]"
+
+
+def clear_spool() -> None:
+    """Delete this session's spooled tool results."""
+    global _SPOOL_DIR
+    if _SPOOL_DIR is not None:
+        shutil.rmtree(_SPOOL_DIR, ignore_errors=True)
+        _SPOOL_DIR = None
+
+
+PROMPT = f"{BOLD}{BLUE}❯{RESET} "
+
+# Horizontal rule sized to the terminal, rebuilt only when it is resized
+SEPARATOR = ""
 
-def separator() -> str:
-    width = min(os.get_terminal_size().columns, 80)
-    return f"{DIM}{'─' * width}{RESET}"
+
+def update_separator(*_signal_args: Any) -> None:
+    """Rebuild ``SEPARATOR`` for the current terminal width (also a SIGWINCH handler)."""
+    global SEPARATOR
+    try:
+        width = min(os.get_terminal_size().columns, 80)
+    except OSError:
+        width = 80
+    SEPARATOR = f"{DIM}{'─' * width}{RESET}"
+
+
+def tool_call_label(block: Dict[str, Any]) -> str:
+    """Format a tool_use block as its name and a preview of the first argument value."""
+    tool_args = block["input"]
+    arg_preview = str(list(tool_args.values())[0])[:50] if tool_args else ""
+    return f"{GREEN}⏺ {block['name'].capitalize()}{RESET}({DIM}{arg_preview}{RESET})"
 
 
 def render_markdown(text: str) -> str:
     """Render bold text in the terminal by replacing **text** markers."""
-    return re.sub(r"\*\*(.+?)\*\*", f"{BOLD}\\1{RESET}", text)
+    return _BOLD_RE.sub(f"{BOLD}\\1{RESET}", text)
 
 
 def main() -> None:
+    update_separator()
+    if hasattr(signal, "SIGWINCH"):
+        signal.signal(signal.SIGWINCH, update_separator)
     print(f"{BOLD}nanocode{RESET} | {DIM}{MODEL} | {os.getcwd()}{RESET}\n")
     messages: List[Dict[str, Any]] = []
     system_prompt = f"Concise coding assistant. cwd: {os.getcwd()}"
+    # Tools started while the current response streams, by tool_use id
+    pending: Dict[str, Tuple[Dict[str, Any], Future]] = {}
+
+    def start_tool(block: Dict[str, Any]) -> None:
+        future = _TOOL_EXECUTOR.submit(run_tool, block["name"], block["input"])
+        pending[block["id"]] = (block, future)
+
     while True:
         try:
-            print(separator())
-            user_input = input(f"{BOLD}{BLUE}❯{RESET} ").strip()
-            print(separator())
+            print(SEPARATOR)
+            user_input = input(PROMPT).strip()
+            print(SEPARATOR)
             if not user_input:
                 continue
             if user_input in ("/q", "exit"):
                 break
             if user_input == "/c":
                 messages = []
+                reset_converted_messages()
+                clear_spool()
                 print(f"{GREEN}⏺ Cleared conversation{RESET}")
                 continue
+            # Files may have changed outside nanocode since the last turn
+            invalidate_tool_cache()
             messages.append({"role": "user", "content": user_input})
             # Agentic loop: keep calling API until no more tool calls
             while True:
-                response = call_api(messages, system_prompt)
+                pending.clear()
+                try:
+                    response = call_api(messages, system_prompt, start_tool)
+                except Exception:
+                    # Tools started before the stream failed have run (or are
+                    # still running); let them finish and say so, since the
+                    # failed response is not recorded in the history.
+                    for started, future in pending.values():
+                        future.result()
+                        print(f"{tool_call_label(started)} {YELLOW}ran before the error{RESET}")
+                    raise
                 content_blocks = response.get("content", [])
                 tool_results: List[Dict[str, Any]] = []
+                # Collect this response's output and write it in one go
+                out: List[str] = []
                 for block in content_blocks:
                     if block["type"] == "text":
-                        print(f"\n{CYAN}⏺{RESET} {render_markdown(block['text'])}")
+                        out.append(f"\n{CYAN}⏺{RESET} {render_markdown(block['text'])}\n")
                     if block["type"] == "tool_use":
                         tool_name = block["name"]
                         tool_args = block["input"]
-                        # Show a preview of the first argument value
-                        arg_preview = str(list(tool_args.values())[0])[:50] if tool_args else ""
-                        print(
-                            f"\n{GREEN}⏺ {tool_name.capitalize()}{RESET}({DIM}{arg_preview}{RESET})"
-                        )
-                        result = run_tool(tool_name, tool_args)
-                        result_lines = result.split("\n")
-                        preview = result_lines[0][:60]
-                        if len(result_lines) > 1:
-                            preview += f" ... +{len(result_lines) - 1} lines"
-                        elif len(result_lines[0]) > 60:
+                        out.append(f"\n{tool_call_label(block)}\n")
+                        if block["id"] in pending:
+                            result = pending[block["id"]][1].result()
+                        else:
+                            # The stream never signalled this block as complete
+                            result = run_tool(tool_name, tool_args)
+                        first_line = result.partition("\n")[0]
+                        extra_lines = result.count("\n")
+                        preview = first_line[:60]
+                        if extra_lines:
+                            preview += f" ... +{extra_lines} lines"
+                        elif len(first_line) > 60:
                             preview += "..."
-                        print(f" {DIM}⎿ {preview}{RESET}")
+                        out.append(f" {DIM}⎿ {preview}{RESET}\n")
                         tool_results.append(
                             {
                                 "type": "tool_result",
                                 "tool_use_id": block["id"],
-                                "content": result,
+                                "content": spool_result(tool_name, tool_args, result),
                             }
                         )
+                sys.stdout.write("".join(out))
+                sys.stdout.flush()
                 # Record the assistant message
                 messages.append({"role": "assistant", "content": content_blocks})
                 # If no tools were invoked, break
@@ -421,6 +898,7 @@ def main() -> None:
             break
         except Exception as err:
             print(f"{RED}⏺ Error: {err}{RESET}")
+    clear_spool()
 
 
 if __name__ == "__main__":